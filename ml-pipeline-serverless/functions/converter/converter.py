@@ -1,6 +1,7 @@
 ﻿
 import pandas as pd
 import os
+import json
 
 
 input_excel = "/data/raw/OnlineRetail.xlsx"
@@ -17,6 +18,14 @@ except Exception as e:
 try:
     df.to_csv(output_csv, index=False, encoding="utf-8")
     print(f"File CSV salvato in: {output_csv}")
+
+    # Statistiche per l'anteprima web, evitano di rileggere l'intero CSV
+    meta = {
+        "rows": len(df),
+        "null_counts": {col: int(n) for col, n in df.isnull().sum().items()}
+    }
+    with open("/data/raw/OnlineRetail_meta.json", "w") as f:
+        json.dump(meta, f)
 except Exception as e:
     print(f"Impossibile salvare il file CSV: {e}")
     exit(1)
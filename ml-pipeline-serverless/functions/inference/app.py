@@ -14,27 +14,30 @@ with open("/data/processed/country_mapping.json", "r") as f:
 with open("/data/processed/stockcode_mapping.json", "r") as f:
     stockcode_map = json.load(f)
 
+def build_row(data):
+    qty = float(data.get("Quantity", 0))
+    price = float(data.get("UnitPrice", 0))
+    customer_id = int(data.get("CustomerID", -1))
+    country = data.get("Country")
+    country_code = country_map.get(str(country), 0)
+    stockcode = data.get("StockCode")
+    if stockcode is not None and str(stockcode) in stockcode_map:
+        stockcode_code = stockcode_map[str(stockcode)]
+    else:
+        stockcode_code = 0
+    return {
+        "Quantity": qty,
+        "UnitPrice": price,
+        "CustomerID": customer_id,
+        "StockCode": stockcode_code,
+        "CountryCode": country_code
+    }
+
 @app.route("/predict", methods=["POST"])
 def predict():
     data = request.get_json(force=True)
     try:
-        qty = float(data.get("Quantity", 0))
-        price = float(data.get("UnitPrice", 0))
-        customer_id = int(data.get("CustomerID", -1))
-        country = data.get("Country")
-        country_code = country_map.get(str(country), 0)
-        stockcode = data.get("StockCode")
-        if stockcode is not None and str(stockcode) in stockcode_map:
-            stockcode_code = stockcode_map[str(stockcode)]
-        else:
-            stockcode_code = 0
-        X_df = pd.DataFrame([{
-            "Quantity": qty,
-            "UnitPrice": price,
-            "CustomerID": customer_id,
-            "StockCode": stockcode_code,
-            "CountryCode": country_code
-        }])
+        X_df = pd.DataFrame([build_row(data)])
         columns = joblib.load("/data/model/columns.pkl")
         X_df = X_df[columns]
 
@@ -45,5 +48,42 @@ def predict():
         result = {"error": str(e)}
     return jsonify(result)
 
+@app.route("/predict_batch", methods=["POST"])
+def predict_batch():
+    samples = request.get_json(force=True)
+    if not isinstance(samples, list):
+        return jsonify({"error": "Atteso un array JSON di campioni"}), 400
+
+    results = [None] * len(samples)
+    rows, positions = [], []
+    for i, data in enumerate(samples):
+        try:
+            row = build_row(data)
+            # Un valore non finito farebbe fallire l'intero batch
+            if not np.isfinite(list(row.values())).all():
+                raise ValueError("Valori non finiti nel campione")
+            rows.append(row)
+            positions.append(i)
+        except Exception as e:
+            results[i] = {"error": str(e)}
+
+    if rows:
+        columns = joblib.load("/data/model/columns.pkl")
+        try:
+            # Una sola chiamata vettorizzata per tutto il batch
+            X_df = pd.DataFrame(rows)[columns]
+            predictions = model.predict(scaler.transform(X_df))
+            for i, value in zip(positions, predictions):
+                results[i] = {"predicted_value": float(value)}
+        except Exception:
+            # Fallback riga per riga: l'errore resta confinato al campione che lo causa
+            for i, row in zip(positions, rows):
+                try:
+                    X_df = pd.DataFrame([row])[columns]
+                    results[i] = {"predicted_value": float(model.predict(scaler.transform(X_df))[0])}
+                except Exception as e:
+                    results[i] = {"error": str(e)}
+    return jsonify(results)
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
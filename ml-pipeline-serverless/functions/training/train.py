@@ -4,29 +4,35 @@ from sklearn.preprocessing import StandardScaler
 import joblib
 import os
 
-data_path = "/data/processed/OnlineRetail_cleaned.csv"
-print(f"Caricamento dataset pulito da {data_path} ...")
 
-df = pd.read_csv(data_path)
+def run(data_path="/data", log=print):
+    cleaned_path = os.path.join(data_path, "processed", "OnlineRetail_cleaned.csv")
+    model_dir = os.path.join(data_path, "model")
+    log(f"Caricamento dataset pulito da {cleaned_path} ...")
 
-if 'TotalPrice' not in df.columns:
-    raise ValueError("La colonna 'TotalPrice' non è presente nel dataset.")
+    df = pd.read_csv(cleaned_path)
 
-y = df['TotalPrice']
-X = df.drop('TotalPrice', axis=1)
-joblib.dump(list(X.columns), "/data/model/columns.pkl")
-print(f"Feature utilizzate: {list(X.columns)}")
+    if 'TotalPrice' not in df.columns:
+        raise ValueError("La colonna 'TotalPrice' non è presente nel dataset.")
 
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
-model = LinearRegression()
-model.fit(X_scaled, y)
+    y = df['TotalPrice']
+    X = df.drop('TotalPrice', axis=1)
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(list(X.columns), os.path.join(model_dir, "columns.pkl"))
+    log(f"Feature utilizzate: {list(X.columns)}")
 
-os.makedirs("/data/model", exist_ok=True)
-model_path = "/data/model/model.pkl"
-joblib.dump(model, "/data/model/model.pkl")
-joblib.dump(scaler, "/data/model/scaler.pkl")
+    scaler = StandardScaler()
+    X_scaled = scaler.fit_transform(X)
+    model = LinearRegression()
+    model.fit(X_scaled, y)
 
-print(f"Modello addestrato salvato in {model_path}.")
-print(f"Coefficienti del modello: {getattr(model, 'coef_', None)}")
+    model_path = os.path.join(model_dir, "model.pkl")
+    joblib.dump(model, model_path)
+    joblib.dump(scaler, os.path.join(model_dir, "scaler.pkl"))
 
+    log(f"Modello addestrato salvato in {model_path}.")
+    log(f"Coefficienti del modello: {getattr(model, 'coef_', None)}")
+
+
+if __name__ == "__main__":
+    run()
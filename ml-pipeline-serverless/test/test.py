@@ -4,24 +4,33 @@ Test script per verificare il funzionamento dell'API ML Pipeline
 """
 
 import requests
+import socketio
 import json
+import threading
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 BASE_URL = "http://localhost:8080"
 INFERENCE_URL = "http://localhost:5000"
+TIMEOUT = (2, 30)  # (connect, read) in secondi per ogni richiesta HTTP
+
+# Sessione condivisa: riutilizza le connessioni TCP tra i test
+SESSION = requests.Session()
+adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+SESSION.mount('http://', adapter)
 
 def test_connection():
     """Test connessione al server"""
     try:
-        response = requests.get(f"{BASE_URL}/status")
+        response = SESSION.get(f"{BASE_URL}/status", timeout=TIMEOUT)
         if response.status_code == 200:
             print("✅ Server web raggiungibile")
             return True
         else:
             print(f"❌ Server web non risponde correttamente: {response.status_code}")
             return False
-    except requests.exceptions.ConnectionError:
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
         print("❌ Impossibile connettersi al server web. Assicurati che sia in esecuzione su porta 8080")
         return False
 
@@ -30,7 +39,7 @@ def test_upload(file_path):
     try:
         with open(file_path, 'rb') as f:
             files = {'file': f}
-            response = requests.post(f"{BASE_URL}/upload", files=files)
+            response = SESSION.post(f"{BASE_URL}/upload", files=files, timeout=TIMEOUT)
 
         if response.status_code == 200:
             data = response.json()
@@ -54,40 +63,97 @@ def wait_for_pipeline():
     """Attende il completamento della pipeline"""
     print("⏳ Attendo il completamento della pipeline...")
     max_wait = 120  # 2 minuti massimo
+    done = threading.Event()
+    outcome = {'success': False}
+    sio = socketio.Client()
+
+    phases = {}
+
+    def check_phases(current_phase):
+        if done.is_set():
+            return
+
+        # Controlla se c'è stato un errore
+        errors = [
+            (phase_name, phase_info.get('message', ''))
+            for phase_name, phase_info in phases.items()
+            if phase_info['status'] == 'error'
+        ]
+
+        # Controlla se tutte le fasi sono complete
+        all_complete = all(
+            phase['status'] == 'completed'
+            for phase in phases.values()
+        )
+
+        if errors:
+            print("❌ Pipeline fallita con errore")
+            for phase_name, message in errors:
+                print(f"   Errore in fase {phase_name}: {message}")
+            done.set()
+        elif all_complete:
+            print("✅ Pipeline completata con successo")
+            outcome['success'] = True
+            done.set()
+        else:
+            # Mostra progresso
+            print(f"   Fase corrente: {current_phase}", end='\r')
+
+    @sio.on('status_update')
+    def on_status_update(status):
+        phases.update(status['phases'])
+        check_phases(status.get('current_phase', 'unknown'))
+
+    @sio.on('phase_update')
+    def on_phase_update(delta):
+        if not phases:
+            return
+        phases[delta['phase']] = {
+            'status': delta['status'],
+            'timestamp': delta['timestamp'],
+            'message': delta['message']
+        }
+        check_phases(delta['current_phase'])
+
+    try:
+        # Il server invia lo stato completo alla connessione e poi solo le fasi modificate
+        try:
+            sio.connect(BASE_URL)
+        except socketio.exceptions.ConnectionError:
+            print("⚠️ WebSocket non disponibile, uso il polling di /status/summary")
+            return poll_pipeline_summary(max_wait)
+        if not done.wait(timeout=max_wait):
+            print("❌ Timeout: la pipeline non si è completata in tempo")
+        return outcome['success']
+    except Exception as e:
+        print(f"❌ Errore durante controllo stato: {e}")
+        return False
+    finally:
+        if sio.connected:
+            sio.disconnect()
+
+def poll_pipeline_summary(max_wait):
+    """Attende il completamento della pipeline interrogando /status/summary"""
     start_time = time.time()
 
     while time.time() - start_time < max_wait:
         try:
-            response = requests.get(f"{BASE_URL}/status")
+            response = SESSION.get(f"{BASE_URL}/status/summary", timeout=TIMEOUT)
             if response.status_code == 200:
-                status = response.json()
-
-                # Controlla se tutte le fasi sono complete
-                all_complete = all(
-                    phase['status'] == 'completed'
-                    for phase in status['phases'].values()
-                )
+                summary = response.json()
 
-                # Controlla se c'è stato un errore
-                has_error = any(
-                    phase['status'] == 'error'
-                    for phase in status['phases'].values()
-                )
-
-                if has_error:
+                if summary['has_error']:
                     print("❌ Pipeline fallita con errore")
-                    for phase_name, phase_info in status['phases'].items():
-                        if phase_info['status'] == 'error':
-                            print(f"   Errore in fase {phase_name}: {phase_info.get('message', '')}")
+                    for phase_name, message in summary['errors']:
+                        print(f"   Errore in fase {phase_name}: {message}")
                     return False
 
-                if all_complete:
+                if summary['all_complete']:
                     print("✅ Pipeline completata con successo")
                     return True
 
                 # Mostra progresso
-                current_phase = status.get('current_phase', 'unknown')
-                print(f"   Fase corrente: {current_phase}", end='\r')
+                print(f"   Fase corrente: {summary['current_phase']}", end='\r')
 
             time.sleep(2)
         except Exception as e:
@@ -97,51 +163,51 @@ def wait_for_pipeline():
     print("❌ Timeout: la pipeline non si è completata in tempo")
     return False
 
-def test_dataset_preview():
+def test_dataset_preview(log=print):
     """Test visualizzazione dataset"""
     try:
-        response = requests.get(f"{BASE_URL}/dataset/preview")
+        response = SESSION.get(f"{BASE_URL}/dataset/preview", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             if 'error' not in data:
-                print(f"✅ Dataset disponibile: {data['rows']} righe, {data['columns']} colonne")
-                print(f"   Sorgente: {data['source']}")
-                print(f"   Colonne: {', '.join(data['column_names'][:5])}...")
+                log(f"✅ Dataset disponibile: {data['rows']} righe, {data['columns']} colonne")
+                log(f"   Sorgente: {data['source']}")
+                log(f"   Colonne: {', '.join(data['column_names'][:5])}...")
                 return True
             else:
-                print(f"❌ Errore lettura dataset: {data['error']}")
+                log(f"❌ Errore lettura dataset: {data['error']}")
                 return False
         else:
-            print(f"❌ Errore HTTP durante lettura dataset: {response.status_code}")
+            log(f"❌ Errore HTTP durante lettura dataset: {response.status_code}")
             return False
     except Exception as e:
-        print(f"❌ Errore durante lettura dataset: {e}")
+        log(f"❌ Errore durante lettura dataset: {e}")
         return False
 
-def test_model_info():
+def test_model_info(log=print):
     """Test informazioni modello"""
     try:
-        response = requests.get(f"{BASE_URL}/model/info")
+        response = SESSION.get(f"{BASE_URL}/model/info", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             if data.get('model_exists'):
-                print("✅ Modello disponibile")
+                log("✅ Modello disponibile")
                 if 'features' in data:
-                    print(f"   Features: {', '.join(data['features'])}")
+                    log(f"   Features: {', '.join(data['features'])}")
                 if 'countries' in data:
-                    print(f"   Paesi disponibili: {len(data['countries'])}")
+                    log(f"   Paesi disponibili: {len(data['countries'])}")
                 return True
             else:
-                print("❌ Modello non ancora disponibile")
+                log("❌ Modello non ancora disponibile")
                 return False
         else:
-            print(f"❌ Errore HTTP durante controllo modello: {response.status_code}")
+            log(f"❌ Errore HTTP durante controllo modello: {response.status_code}")
             return False
     except Exception as e:
-        print(f"❌ Errore durante controllo modello: {e}")
+        log(f"❌ Errore durante controllo modello: {e}")
         return False
 
-def test_inference():
+def test_inference(log=print):
     """Test predizione"""
     test_data = {
         "Quantity": 5,
@@ -153,36 +219,37 @@ def test_inference():
 
     try:
         # Prova prima attraverso il web server
-        response = requests.post(
+        response = SESSION.post(
             f"{BASE_URL}/predict",
             json=test_data,
-            headers={'Content-Type': 'application/json'}
+            headers={'Content-Type': 'application/json'},
+            timeout=TIMEOUT
         )
 
         if response.status_code == 200:
             result = response.json()
             if 'predicted_value' in result:
-                print(f"✅ Predizione eseguita con successo")
-                print(f"   Input: {json.dumps(test_data, indent=2)}")
-                print(f"   Output: €{result['predicted_value']:.2f}")
+                log(f"✅ Predizione eseguita con successo")
+                log(f"   Input: {json.dumps(test_data, indent=2)}")
+                log(f"   Output: €{result['predicted_value']:.2f}")
                 return True
             elif 'error' in result:
-                print(f"❌ Errore durante predizione: {result['error']}")
+                log(f"❌ Errore durante predizione: {result['error']}")
                 return False
         elif response.status_code == 503:
-            print("❌ Servizio di inferenza non disponibile")
+            log("❌ Servizio di inferenza non disponibile")
             return False
         else:
-            print(f"❌ Errore HTTP durante predizione: {response.status_code}")
+            log(f"❌ Errore HTTP durante predizione: {response.status_code}")
             return False
     except Exception as e:
-        print(f"❌ Errore durante test inferenza: {e}")
+        log(f"❌ Errore durante test inferenza: {e}")
         return False
 
 def test_clear():
     """Test reset pipeline"""
     try:
-        response = requests.get(f"{BASE_URL}/clear")
+        response = SESSION.get(f"{BASE_URL}/clear", timeout=TIMEOUT)
         if response.status_code == 200:
             data = response.json()
             if data.get('success'):
@@ -225,17 +292,28 @@ def run_all_tests(dataset_path=None):
     else:
         print("\n2. Test upload saltato (nessun file specificato)")
 
-    # Test 4: Preview dataset
-    print("\n4. Test preview dataset...")
-    results.append(test_dataset_preview())
-
-    # Test 5: Info modello
-    print("\n5. Test informazioni modello...")
-    results.append(test_model_info())
-
-    # Test 6: Inferenza
-    print("\n6. Test inferenza...")
-    results.append(test_inference())
+    # Test 4-6: Preview dataset, info modello e inferenza (sola lettura, in parallelo).
+    # L'output di ogni test viene raccolto e stampato in ordine al termine.
+    parallel_tests = [
+        ('preview', "4. Test preview dataset...", test_dataset_preview),
+        ('model', "5. Test informazioni modello...", test_model_info),
+        ('inference', "6. Test inferenza...", test_inference)
+    ]
+    outputs = {label: [] for label, _, _ in parallel_tests}
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = {
+            executor.submit(test_fn, log=outputs[label].append): label
+            for label, _, test_fn in parallel_tests
+        }
+        for future in as_completed(futures):
+            outcomes[futures[future]] = future.result()
+
+    for label, title, _ in parallel_tests:
+        print(f"\n{title}")
+        for line in outputs[label]:
+            print(line)
+        results.append(outcomes[label])
 
     # Test 7: Clear
     print("\n7. Test reset pipeline...")
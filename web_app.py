@@ -1,23 +1,63 @@
 from flask import Flask, render_template, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_socketio import SocketIO, emit
 import os
-import subprocess
 import threading
 import time
+import queue
+import functools
+import codecs
+import importlib.util
+from collections import deque
 import pandas as pd
 import json
+import joblib
+import orjson
 import requests
+import docker
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from werkzeug.utils import secure_filename
 from datetime import datetime
 import shutil
 
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson (also used for SocketIO payloads)"""
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.options).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.config['SECRET_KEY'] = 'ml-pipeline-secret-key'
 app.config['UPLOAD_FOLDER'] = '/app/data/raw'
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
-socketio = SocketIO(app, cors_allowed_origins="*")
-
-# Global state for pipeline status
+UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # 4MB copy buffer for uploads
+socketio = SocketIO(app, async_mode='threading', cors_allowed_origins="*", json=app.json)
+
+# Persistent session towards the inference service (keep-alive, pooled connections)
+INFERENCE_URL = 'http://ml_inference_service:5000'
+INFERENCE_TIMEOUT = (0.5, 5)  # (connect, read) seconds
+INFERENCE_RETRIES = 2
+INFERENCE_SESSION = requests.Session()
+INFERENCE_SESSION.headers.update({'Connection': 'keep-alive'})
+INFERENCE_SESSION.mount('http://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    # Short retry budget so transient errors while the service warms up self-heal;
+    # read timeouts are not retried to keep a slow call from stalling the dispatcher
+    max_retries=Retry(
+        total=INFERENCE_RETRIES, read=0, backoff_factor=0.05,
+        status_forcelist=[502, 503, 504], allowed_methods=['POST']
+    )
+))
+
+# Global state for pipeline status (logs kept as a bounded ring buffer)
+MAX_LOGS = 1000
 pipeline_status = {
     'current_phase': 'idle',
     'phases': {
@@ -28,15 +68,106 @@ pipeline_status = {
         'inference': {'status': 'pending', 'timestamp': None, 'message': ''}
     },
     'model_ready': False,
-    'logs': []
+    'logs': deque(maxlen=MAX_LOGS)
 }
 
+# Cached /model/info response, invalidated when model artifacts may change
+MODEL_INFO_PHASES = ('upload', 'cleaning', 'training')
+model_info_cache = {'data': None}
+
+# Run cleaning/training in-process unless containerized stages are requested
+USE_DOCKER_STAGES = os.environ.get('USE_DOCKER_STAGES', '0') == '1'
+
+STAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ml-pipeline-serverless', 'functions')
+
+@functools.lru_cache(maxsize=None)
+def load_stage(stage, script):
+    """Import a pipeline stage script from functions/<stage>/ under a namespaced module name"""
+    path = os.path.join(STAGES_DIR, stage, script)
+    spec = importlib.util.spec_from_file_location(f'ml_pipeline_{stage}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+# Micro-batching of /predict requests towards the inference service
+BATCH_SIZE = int(os.environ.get('BATCH_SIZE', 32))
+BATCH_TIMEOUT_MS = int(os.environ.get('BATCH_TIMEOUT_MS', 20))
+pending_predictions = queue.Queue()
+# One inference call with all retries (plus backoff margin); a request may wait
+# for an in-flight batch and then its own batch window and call
+INFERENCE_CALL_BUDGET = (INFERENCE_RETRIES + 1) * sum(INFERENCE_TIMEOUT) + 1
+PREDICT_WAIT_TIMEOUT = 2 * INFERENCE_CALL_BUDGET + BATCH_TIMEOUT_MS / 1000
+
+def prediction_dispatcher():
+    """Collect pending predictions and forward them as a single batch"""
+    while True:
+        batch = [pending_predictions.get()]
+        deadline = time.monotonic() + BATCH_TIMEOUT_MS / 1000
+        while len(batch) < BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(pending_predictions.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        try:
+            response = INFERENCE_SESSION.post(
+                f'{INFERENCE_URL}/predict_batch',
+                json=[item['data'] for item in batch],
+                timeout=INFERENCE_TIMEOUT
+            )
+            response.raise_for_status()
+            results = response.json()
+            if not isinstance(results, list) or len(results) != len(batch):
+                raise ValueError(f"Risposta batch non valida per {len(batch)} richieste")
+        except (requests.exceptions.RequestException, ValueError) as e:
+            add_log(f"Errore chiamata inferenza: {str(e)}", 'error')
+            results = [None] * len(batch)
+
+        for item, result in zip(batch, results):
+            item['result'] = result
+            item['event'].set()
+
+dispatcher_thread = threading.Thread(target=prediction_dispatcher)
+dispatcher_thread.daemon = True
+dispatcher_thread.start()
+
+def get_status_payload():
+    """Return pipeline status without logs (logs are pushed via new_logs)"""
+    return {key: value for key, value in pipeline_status.items() if key != 'logs'}
+
+# Log lines and status changes are coalesced and pushed by a background flusher
+LOG_FLUSH_INTERVAL = 0.05
+pending_logs = deque()
+pending_logs_lock = threading.Lock()
+pending_phase_updates = {}
+status_dirty = threading.Event()
+
+def flush_updates():
+    """Periodically push queued logs and the latest status as single emits"""
+    while True:
+        socketio.sleep(LOG_FLUSH_INTERVAL)
+        with pending_logs_lock:
+            batch = list(pending_logs)
+            pending_logs.clear()
+            phase_updates = list(pending_phase_updates.values())
+            pending_phase_updates.clear()
+        for delta in phase_updates:
+            socketio.emit('phase_update', delta)
+        if batch:
+            socketio.emit('new_logs', batch)
+        if status_dirty.is_set():
+            status_dirty.clear()
+            socketio.emit('status_update', get_status_payload())
+
 def emit_status_update():
-    """Emit current pipeline status to all connected clients"""
-    socketio.emit('status_update', pipeline_status)
+    """Schedule emission of the full pipeline status (used after resets)"""
+    status_dirty.set()
 
 def add_log(message, level='info'):
-    """Add log message and emit to clients"""
+    """Add log message and queue it for clients"""
     print(f"[{level.upper()}] {message}")
     log_entry = {
         'timestamp': datetime.now().strftime('%H:%M:%S'),
@@ -44,16 +175,29 @@ def add_log(message, level='info'):
         'level': level
     }
     pipeline_status['logs'].append(log_entry)
-    socketio.emit('new_log', log_entry)
+    with pending_logs_lock:
+        pending_logs.append(log_entry)
+
+socketio.start_background_task(flush_updates)
 
 def update_phase(phase, status, message=''):
-    """Update phase status and emit to clients"""
-    pipeline_status['phases'][phase]['status'] = status
-    pipeline_status['phases'][phase]['timestamp'] = datetime.now().strftime('%H:%M:%S')
-    pipeline_status['phases'][phase]['message'] = message
+    """Update phase status and queue the changed phase for clients"""
+    timestamp = datetime.now().strftime('%H:%M:%S')
+    pipeline_status['phases'][phase] = {'status': status, 'timestamp': timestamp, 'message': message}
     pipeline_status['current_phase'] = phase
+    if phase in MODEL_INFO_PHASES:
+        model_info_cache['data'] = None
     add_log(f"Fase {phase}: {status} - {message}", 'info' if status != 'error' else 'error')
-    emit_status_update()
+    delta = {
+        'phase': phase,
+        'status': status,
+        'timestamp': timestamp,
+        'message': message,
+        'current_phase': phase,
+        'model_ready': pipeline_status['model_ready']
+    }
+    with pending_logs_lock:
+        pending_phase_updates[phase] = delta
 
 def get_host_data_path():
     """Get the host data path for Docker volume mounting"""
@@ -69,6 +213,66 @@ def get_data_path():
     """Get the data directory path inside the container"""
     return "/app/data"
 
+@functools.lru_cache(maxsize=1)
+def get_docker_client():
+    """Return the shared Docker client (one persistent connection to the daemon)"""
+    return docker.from_env()
+
+def run_container(image, prefix, timeout, environment=None):
+    """Run a container streaming its output to the logs, return exit code and output tail"""
+    container = get_docker_client().containers.run(
+        image,
+        volumes={get_host_data_path(): {'bind': '/data', 'mode': 'rw'}},
+        # Unbuffered stdout so lines reach the logs (and the watchdog) as they are printed
+        environment={'PYTHONUNBUFFERED': '1', **(environment or {})},
+        detach=True
+    )
+    tail = deque(maxlen=20)
+    last_output = [time.monotonic()]
+
+    def emit_line(line):
+        tail.append(line)
+        add_log(f"{prefix}: {line}")
+
+    def pump():
+        # Log frames are write-sized: keep partial lines and split UTF-8 sequences across frames
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        partial = ''
+        for chunk in container.logs(stream=True, follow=True):
+            last_output[0] = time.monotonic()
+            *lines, partial = (partial + decoder.decode(chunk)).split('\n')
+            for line in lines:
+                emit_line(line.rstrip('\r'))
+        partial += decoder.decode(b'', final=True)
+        if partial:
+            emit_line(partial.rstrip('\r'))
+
+    reader = threading.Thread(target=pump)
+    reader.daemon = True
+    reader.start()
+
+    try:
+        while True:
+            try:
+                returncode = container.wait(timeout=1)['StatusCode']
+                break
+            except requests.exceptions.RequestException:
+                # Inactivity watchdog: kill only after `timeout` seconds without output
+                if time.monotonic() - last_output[0] > timeout:
+                    container.kill()
+                    raise TimeoutError(f"{image} senza output per {timeout}s")
+        reader.join()
+    finally:
+        container.remove(force=True)
+    return returncode, '\n'.join(tail)
+
+def remove_inference_service():
+    """Stop and remove the inference service container if it exists"""
+    try:
+        get_docker_client().containers.get('ml_inference_service').remove(force=True)
+    except docker.errors.NotFound:
+        pass
+
 def run_pipeline(filename):
     """Execute the ML pipeline"""
     data_path = get_data_path()
@@ -104,17 +308,11 @@ def run_pipeline(filename):
 
             # Execute converter container with host path
             try:
-                cmd = [
-                    "docker", "run", "--rm",
-                    "-v", f"{host_data_path}:/data",
-                    "ml-pipeline-converter"
-                ]
-                add_log(f"Esecuzione comando: {' '.join(cmd)}")
+                add_log("Avvio container ml-pipeline-converter")
 
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+                returncode, output = run_container('ml-pipeline-converter', 'Converter output', timeout=300)
 
-                if result.returncode == 0:
-                    add_log(f"Converter output: {result.stdout}")
+                if returncode == 0:
                     # Check if CSV was actually created
                     csv_path = os.path.join(data_path, 'raw', 'OnlineRetail.csv')
                     if os.path.exists(csv_path):
@@ -124,10 +322,10 @@ def run_pipeline(filename):
                         update_phase('conversion', 'error', 'CSV non creato dopo conversione')
                         return
                 else:
-                    add_log(f"Converter error: {result.stderr}", 'error')
-                    update_phase('conversion', 'error', f"Errore conversione: {result.stderr}")
+                    add_log(f"Converter error: exit code {returncode}", 'error')
+                    update_phase('conversion', 'error', f"Errore conversione: {output}")
                     return
-            except subprocess.TimeoutExpired:
+            except TimeoutError:
                 update_phase('conversion', 'error', 'Timeout durante la conversione')
                 return
             except Exception as e:
@@ -159,36 +357,48 @@ def run_pipeline(filename):
         # Create processed directory if it doesn't exist
         os.makedirs(os.path.join(data_path, 'processed'), exist_ok=True)
 
-        try:
-            cmd = [
-                "docker", "run", "--rm",
-                "-v", f"{host_data_path}:/data",
-                "-e", f"DATASET_FILE={filename}",
-                "ml-pipeline-cleaning"
-            ]
-            add_log(f"Esecuzione comando: {' '.join(cmd)}")
-
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-
-            if result.returncode == 0:
-                add_log(f"Cleaning output: {result.stdout}")
-                # Check if cleaned file was created
-                cleaned_path = os.path.join(data_path, 'processed', 'OnlineRetail_cleaned.csv')
-                if os.path.exists(cleaned_path):
-                    update_phase('cleaning', 'completed', 'Dati puliti e trasformati')
+        if not USE_DOCKER_STAGES:
+            try:
+                load_stage('cleaning', 'cleaning.py').run(data_path, filename, log=add_log)
+            except Exception as e:
+                add_log(f"Cleaning error: {str(e)}", 'error')
+                update_phase('cleaning', 'error', f"Errore pulizia: {str(e)}")
+                return
+
+            # Check if cleaned file was created
+            cleaned_path = os.path.join(data_path, 'processed', 'OnlineRetail_cleaned.csv')
+            if os.path.exists(cleaned_path):
+                update_phase('cleaning', 'completed', 'Dati puliti e trasformati')
+            else:
+                update_phase('cleaning', 'error', 'File pulito non creato')
+                return
+        else:
+            try:
+                add_log("Avvio container ml-pipeline-cleaning")
+
+                returncode, output = run_container(
+                    'ml-pipeline-cleaning', 'Cleaning output', timeout=300,
+                    environment={'DATASET_FILE': filename}
+                )
+
+                if returncode == 0:
+                    # Check if cleaned file was created
+                    cleaned_path = os.path.join(data_path, 'processed', 'OnlineRetail_cleaned.csv')
+                    if os.path.exists(cleaned_path):
+                        update_phase('cleaning', 'completed', 'Dati puliti e trasformati')
+                    else:
+                        update_phase('cleaning', 'error', 'File pulito non creato')
+                        return
                 else:
-                    update_phase('cleaning', 'error', 'File pulito non creato')
+                    add_log(f"Cleaning error: exit code {returncode}", 'error')
+                    update_phase('cleaning', 'error', f"Errore pulizia: {output}")
                     return
-            else:
-                add_log(f"Cleaning error: {result.stderr}", 'error')
-                update_phase('cleaning', 'error', f"Errore pulizia: {result.stderr}")
+            except TimeoutError:
+                update_phase('cleaning', 'error', 'Timeout durante la pulizia')
+                return
+            except Exception as e:
+                update_phase('cleaning', 'error', f'Errore esecuzione cleaning: {str(e)}')
                 return
-        except subprocess.TimeoutExpired:
-            update_phase('cleaning', 'error', 'Timeout durante la pulizia')
-            return
-        except Exception as e:
-            update_phase('cleaning', 'error', f'Errore esecuzione cleaning: {str(e)}')
-            return
 
         # Phase 3: Training
         update_phase('training', 'running', 'Addestramento modello ML...')
@@ -196,92 +406,98 @@ def run_pipeline(filename):
         # Create model directory if it doesn't exist
         os.makedirs(os.path.join(data_path, 'model'), exist_ok=True)
 
-        try:
-            cmd = [
-                "docker", "run", "--rm",
-                "-v", f"{host_data_path}:/data",
-                "ml-pipeline-training"
-            ]
-            add_log(f"Esecuzione comando: {' '.join(cmd)}")
-
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
-
-            if result.returncode == 0:
-                add_log(f"Training output: {result.stdout}")
-                # Check if model was created
-                model_path = os.path.join(data_path, 'model', 'model.pkl')
-                if os.path.exists(model_path):
-                    update_phase('training', 'completed', 'Modello addestrato con successo')
+        if not USE_DOCKER_STAGES:
+            try:
+                load_stage('training', 'train.py').run(data_path, log=add_log)
+            except Exception as e:
+                add_log(f"Training error: {str(e)}", 'error')
+                update_phase('training', 'error', f"Errore training: {str(e)}")
+                return
+
+            # Check if model was created
+            model_path = os.path.join(data_path, 'model', 'model.pkl')
+            if os.path.exists(model_path):
+                update_phase('training', 'completed', 'Modello addestrato con successo')
+            else:
+                update_phase('training', 'error', 'Modello non creato')
+                return
+        else:
+            try:
+                add_log("Avvio container ml-pipeline-training")
+
+                returncode, output = run_container('ml-pipeline-training', 'Training output', timeout=600)
+
+                if returncode == 0:
+                    # Check if model was created
+                    model_path = os.path.join(data_path, 'model', 'model.pkl')
+                    if os.path.exists(model_path):
+                        update_phase('training', 'completed', 'Modello addestrato con successo')
+                    else:
+                        update_phase('training', 'error', 'Modello non creato')
+                        return
                 else:
-                    update_phase('training', 'error', 'Modello non creato')
+                    add_log(f"Training error: exit code {returncode}", 'error')
+                    update_phase('training', 'error', f"Errore training: {output}")
                     return
-            else:
-                add_log(f"Training error: {result.stderr}", 'error')
-                update_phase('training', 'error', f"Errore training: {result.stderr}")
+            except TimeoutError:
+                update_phase('training', 'error', 'Timeout durante il training')
+                return
+            except Exception as e:
+                update_phase('training', 'error', f'Errore esecuzione training: {str(e)}')
                 return
-        except subprocess.TimeoutExpired:
-            update_phase('training', 'error', 'Timeout durante il training')
-            return
-        except Exception as e:
-            update_phase('training', 'error', f'Errore esecuzione training: {str(e)}')
-            return
 
         # Phase 4: Inference Service
         update_phase('inference', 'running', 'Avvio servizio di inferenza...')
 
-        # Stop existing inference service if running
-        subprocess.run(["docker", "stop", "ml_inference_service"], capture_output=True)
-        subprocess.run(["docker", "rm", "ml_inference_service"], capture_output=True)
-
-        # Start new inference service
         try:
+            # Stop existing inference service if running
+            remove_inference_service()
+
+            # Start new inference service
+            client = get_docker_client()
+
             # Cerca reti che contengono ml_pipeline_network nel nome
-            network_cmd = [
-                "docker", "network", "ls", "--format", "{{.Name}}", "--filter", "name=ml_pipeline_network"
-                ]
-            network_result = subprocess.run(network_cmd, capture_output=True, text=True)
-            networks = network_result.stdout.strip().split('\n')
-    
+            networks = client.networks.list(filters={'name': 'ml_pipeline_network'})
+
             # Prendi la prima rete trovata o usa il valore di default
-            if networks and networks[0]:
-                network_name = networks[0]
+            if networks:
+                network_name = networks[0].name
                 add_log(f"Trovata rete Docker: {network_name}")
             else:
                 network_name = "ml_pipeline_network"  # Nome di default dalla docker-compose
                 add_log(f"Nessuna rete trovata, utilizzo default: {network_name}", 'warning')
-            
-            cmd = [
-                "docker", "run", "-d", "--name", "ml_inference_service",
-                "--network", network_name,
-                "-v", f"{host_data_path}:/data",
-                "-p", "5000:5000",
-                "ml-pipeline-inference"
-            ]
-            add_log(f"Esecuzione comando: {' '.join(cmd)}")
-
-            result = subprocess.run(cmd, capture_output=True, text=True)
-
-            if result.returncode == 0:
-                time.sleep(5)  # Wait for service to start
-                # Test if service is actually running
-                try:
-                    test_response = requests.get('http://ml_inference_service:5000/predict', timeout=10)
-                    update_phase('inference', 'completed', 'Servizio attivo su porta 5000')
+
+            add_log("Avvio container ml-pipeline-inference")
+
+            try:
+                container = client.containers.run(
+                    'ml-pipeline-inference',
+                    name='ml_inference_service',
+                    network=network_name,
+                    volumes={host_data_path: {'bind': '/data', 'mode': 'rw'}},
+                    ports={'5000/tcp': 5000},
+                    detach=True
+                )
+            except docker.errors.DockerException as e:
+                add_log(f"Inference error: {str(e)}", 'error')
+                update_phase('inference', 'error', f"Errore inferenza: {str(e)}")
+                return
+
+            time.sleep(5)  # Wait for service to start
+            # Test if service is actually running
+            try:
+                test_response = INFERENCE_SESSION.get(f'{INFERENCE_URL}/predict', timeout=(2, 10))
+                pipeline_status['model_ready'] = True
+                update_phase('inference', 'completed', 'Servizio attivo su porta 5000')
+            except requests.exceptions.RequestException:
+                # Service might be starting, check container status
+                container.reload()
+
+                if container.status == 'running':
                     pipeline_status['model_ready'] = True
-                except requests.exceptions.RequestException:
-                    # Service might be starting, check container status
-                    check_result = subprocess.run([
-                        "docker", "ps", "--filter", "name=ml_inference_service", "--format", "{{.Status}}"
-                    ], capture_output=True, text=True)
-
-                    if "Up" in check_result.stdout:
-                        update_phase('inference', 'completed', 'Servizio in avvio su porta 5000')
-                        pipeline_status['model_ready'] = True
-                    else:
-                        update_phase('inference', 'error', 'Servizio non si è avviato correttamente')
-            else:
-                add_log(f"Inference error: {result.stderr}", 'error')
-                update_phase('inference', 'error', f"Errore inferenza: {result.stderr}")
+                    update_phase('inference', 'completed', 'Servizio in avvio su porta 5000')
+                else:
+                    update_phase('inference', 'error', 'Servizio non si è avviato correttamente')
         except Exception as e:
             update_phase('inference', 'error', f'Errore avvio inferenza: {str(e)}')
 
@@ -305,8 +521,9 @@ def upload_file():
         # Reset pipeline status
         for phase in pipeline_status['phases']:
             pipeline_status['phases'][phase] = {'status': 'pending', 'timestamp': None, 'message': ''}
-        pipeline_status['logs'] = []
+        pipeline_status['logs'].clear()
         pipeline_status['model_ready'] = False
+        emit_status_update()
 
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
@@ -314,8 +531,9 @@ def upload_file():
         # Ensure directory exists
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-        # Save file
-        file.save(filepath)
+        # Save file using large blocks to reduce read/write syscalls
+        with open(filepath, 'wb') as out:
+            shutil.copyfileobj(file.stream, out, length=UPLOAD_CHUNK_SIZE)
         update_phase('upload', 'completed', f'File {filename} caricato con successo')
 
         # Start pipeline in background thread
@@ -327,6 +545,36 @@ def upload_file():
 
     return jsonify({'error': 'Formato file non supportato. Usa .xlsx o .csv'}), 400
 
+@functools.lru_cache(maxsize=2)
+def load_dataset_stats(path, mtime, encoding=None):
+    """Compute preview statistics for a CSV, cached per (path, mtime)"""
+    # Only the first rows are needed for the sample, columns and dtypes
+    head = pd.read_csv(path, nrows=100, encoding=encoding)
+
+    # Use the metadata written by the cleaning phase when it is up to date
+    meta_path = os.path.splitext(path)[0] + '_meta.json'
+    if os.path.exists(meta_path) and os.path.getmtime(meta_path) >= mtime:
+        with open(meta_path, 'r') as f:
+            meta = json.load(f)
+        rows, null_counts = meta['rows'], meta['null_counts']
+    else:
+        # Fallback: stream the file in chunks to keep memory bounded
+        rows = 0
+        null_counts = pd.Series(0, index=head.columns)
+        for chunk in pd.read_csv(path, chunksize=100000, encoding=encoding):
+            rows += len(chunk)
+            null_counts = null_counts.add(chunk.isnull().sum(), fill_value=0)
+        null_counts = {col: int(n) for col, n in null_counts.items()}
+
+    return {
+        'rows': rows,
+        'columns': len(head.columns),
+        'column_names': head.columns.tolist(),
+        'sample_data': head.to_dict('records'),
+        'dtypes': head.dtypes.astype(str).to_dict(),
+        'null_counts': null_counts
+    }
+
 @app.route('/dataset/preview')
 def dataset_preview():
     try:
@@ -337,26 +585,15 @@ def dataset_preview():
         raw_path = os.path.join(data_path, 'raw', 'OnlineRetail.csv')
 
         if os.path.exists(cleaned_path):
-            df = pd.read_csv(cleaned_path)
+            stats = load_dataset_stats(cleaned_path, os.path.getmtime(cleaned_path))
             source = 'processed'
         elif os.path.exists(raw_path):
-            df = pd.read_csv(raw_path, encoding='unicode_escape')
+            stats = load_dataset_stats(raw_path, os.path.getmtime(raw_path), 'unicode_escape')
             source = 'raw'
         else:
             return jsonify({'error': 'Nessun dataset disponibile'}), 404
 
-        # Get basic statistics
-        stats = {
-            'rows': len(df),
-            'columns': len(df.columns),
-            'column_names': df.columns.tolist(),
-            'source': source,
-            'sample_data': df.head(100).to_dict('records'),
-            'dtypes': df.dtypes.astype(str).to_dict(),
-            'null_counts': df.isnull().sum().to_dict()
-        }
-
-        return jsonify(stats)
+        return jsonify({**stats, 'source': source})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -365,19 +602,21 @@ def predict():
     try:
         data = request.json
 
-        # Forward request to inference service
-        try:
-            response = requests.post('http://ml_inference_service:5000/predict', json=data, timeout=5)
-            return jsonify(response.json())
-        except requests.exceptions.RequestException as e:
-            add_log(f"Errore chiamata inferenza: {str(e)}", 'error')
+        # Queue request for the batching dispatcher and wait for its result
+        item = {'data': data, 'event': threading.Event(), 'result': None}
+        pending_predictions.put(item)
+        if not item['event'].wait(timeout=PREDICT_WAIT_TIMEOUT) or item['result'] is None:
             return jsonify({'error': 'Servizio di inferenza non disponibile'}), 503
+        return jsonify(item['result'])
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/model/info')
 def model_info():
     try:
+        if model_info_cache['data'] is not None:
+            return jsonify(model_info_cache['data'])
+
         data_path = get_data_path()
 
         info = {
@@ -389,7 +628,6 @@ def model_info():
         }
 
         if info['columns_exists']:
-            import joblib
             columns = joblib.load(os.path.join(data_path, 'model', 'columns.pkl'))
             info['features'] = columns
 
@@ -397,37 +635,53 @@ def model_info():
             with open(os.path.join(data_path, 'processed', 'country_mapping.json'), 'r') as f:
                 info['countries'] = list(json.load(f).keys())
 
+        model_info_cache['data'] = info
         return jsonify(info)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/status')
 def get_status():
-    return jsonify(pipeline_status)
+    return jsonify({**get_status_payload(), 'logs': list(pipeline_status['logs'])})
+
+@app.route('/status/summary')
+def status_summary():
+    phases = pipeline_status['phases']
+    errors = [(name, phase['message']) for name, phase in phases.items() if phase['status'] == 'error']
+    return jsonify({
+        'current_phase': pipeline_status['current_phase'],
+        'all_complete': all(phase['status'] == 'completed' for phase in phases.values()),
+        'has_error': bool(errors),
+        'errors': errors,
+        'model_ready': pipeline_status['model_ready']
+    })
+
+def ignore_missing(func, path, exc_info):
+    """rmtree error handler: skip entries already gone, re-raise anything else"""
+    if not issubclass(exc_info[0], FileNotFoundError):
+        raise exc_info[1]
 
 @app.route('/clear')
 def clear_data():
     try:
         # Stop inference service
-        subprocess.run(["docker", "stop", "ml_inference_service"], capture_output=True)
-        subprocess.run(["docker", "rm", "ml_inference_service"], capture_output=True)
+        remove_inference_service()
 
         # Clear data directories
         data_path = get_data_path()
         for folder in ['raw', 'processed', 'model']:
             folder_path = os.path.join(data_path, folder)
-            if os.path.exists(folder_path):
-                for file in os.listdir(folder_path):
-                    file_path = os.path.join(folder_path, file)
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
+            shutil.rmtree(folder_path, onerror=ignore_missing)
+            os.makedirs(folder_path, exist_ok=True)
 
         # Reset status
         for phase in pipeline_status['phases']:
             pipeline_status['phases'][phase] = {'status': 'pending', 'timestamp': None, 'message': ''}
-        pipeline_status['logs'] = []
+        pipeline_status['logs'].clear()
         pipeline_status['model_ready'] = False
         pipeline_status['current_phase'] = 'idle'
+        model_info_cache['data'] = None
+        load_dataset_stats.cache_clear()
 
         emit_status_update()
         return jsonify({'success': True})
@@ -436,9 +690,10 @@ def clear_data():
 
 @socketio.on('connect')
 def handle_connect():
-    emit('status_update', pipeline_status)
+    emit('status_update', get_status_payload())
 
-if __name__ == '__main__':
+def prepare_environment():
+    """Create data directories and log environment information"""
     # Ensure data directories exist
     data_path = get_data_path()
     for folder in ['raw', 'processed', 'model']:
@@ -451,5 +706,10 @@ if __name__ == '__main__':
     print(f"HOST_DATA_PATH env: {os.environ.get('HOST_DATA_PATH', 'NOT SET')}")
     print("========================")
 
+# Runs on import so it also applies when served by gunicorn
+prepare_environment()
+
+if __name__ == '__main__':
+    # Development server only: in the container the app is served by gunicorn
     print("Starting ML Pipeline Web Interface on http://localhost:8080")
-    socketio.run(app, debug=True, port=8080, host='0.0.0.0', allow_unsafe_werkzeug=True)
\ No newline at end of file
+    socketio.run(app, debug=os.environ.get('FLASK_DEBUG') == '1', port=8080, host='0.0.0.0', allow_unsafe_werkzeug=True)
\ No newline at end of file